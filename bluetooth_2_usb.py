@@ -1,46 +1,62 @@
 import asyncio
 import atexit
+from functools import lru_cache
 from logging import DEBUG
+import os
 from pathlib import Path
 import signal
 import sys
+from types import MappingProxyType
+from typing import TYPE_CHECKING
 
-import usb_hid
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
 from src.bluetooth_2_usb.args import parse_args
 from src.bluetooth_2_usb.logging import add_file_handler, get_logger
-from src.bluetooth_2_usb.relay import (
-    GadgetManager,
-    RelayController,
-    ShortcutToggler,
-    UdcStateMonitor,
-    UdevEventMonitor,
-    async_list_input_devices,
-)
+
+if TYPE_CHECKING:
+    from src.bluetooth_2_usb.relay import GadgetManager, ShortcutToggler
 
 logger = get_logger()
 VERSION = "0.9.1"
 VERSIONED_NAME = f"Bluetooth 2 USB v{VERSION}"
 
-shutdown_event = asyncio.Event()
+_ALIAS_MAP = MappingProxyType(
+    {
+        "SHIFT": "LEFTSHIFT",
+        "LSHIFT": "LEFTSHIFT",
+        "RSHIFT": "RIGHTSHIFT",
+        "CTRL": "LEFTCTRL",
+        "LCTRL": "LEFTCTRL",
+        "RCTRL": "RIGHTCTRL",
+        "ALT": "LEFTALT",
+        "LALT": "LEFTALT",
+        "RALT": "RIGHTALT",
+        "GUI": "LEFTMETA",
+        "LMETA": "LEFTMETA",
+        "RMETA": "RIGHTMETA",
+    }
+)
+"""Aliases accepted for modifier keys in the interrupt shortcut"""
+
+_SHUTDOWN_TIMEOUT = 2.0
+"""Seconds the device relays get to release their devices before being cancelled"""
 
 
-def signal_handler(sig, frame):
+def request_shutdown(sig: signal.Signals, shutdown_event: asyncio.Event) -> None:
     """
-    Signal handler that sets the global shutdown_event.
+    Signal callback run by the event loop that sets the shutdown_event.
 
-    :param sig: Integer signal number
-    :param frame: Unused stack frame object
+    :param sig: The received signal
+    :param shutdown_event: Event main() waits for before shutting down
     """
-    sig_name = signal.Signals(sig).name
-    logger.debug(f"Received signal: {sig_name}. Requesting graceful shutdown.")
+    logger.debug("Received signal: %s. Requesting graceful shutdown.", sig.name)
     shutdown_event.set()
 
 
-for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT):
-    signal.signal(sig, signal_handler)
-
-
 async def main() -> None:
     """
     Main entry point for Bluetooth 2 USB.
@@ -53,6 +69,11 @@ async def main() -> None:
     6. Monitors for UDC state changes and new/removed /dev/input devices.
     7. Waits for a shutdown signal to cancel tasks.
     """
+    shutdown_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP, signal.SIGQUIT):
+        loop.add_signal_handler(sig, request_shutdown, sig, shutdown_event)
+
     args = parse_args()
 
     if args.debug:
@@ -64,64 +85,77 @@ async def main() -> None:
     if args.list_devices:
         await async_list_devices()
 
-    log_handlers_message = "Logging to stdout"
     if args.log_to_file:
         try:
             add_file_handler(args.log_path)
         except OSError as e:
-            logger.error(f"Could not open log file '{args.log_path}' for writing: {e}")
+            logger.error(
+                "Could not open log file '%s' for writing: %s", args.log_path, e
+            )
             sys.exit(1)
-        log_handlers_message += f" and to {args.log_path}"
 
-    logger.debug(f"CLI args: {args}")
-    logger.debug(log_handlers_message)
-    logger.info(f"Launching {VERSIONED_NAME}")
+    # Deferred until here, so --version and --list_devices skip loading the HID stack
+    from src.bluetooth_2_usb.relay import (
+        GadgetManager,
+        RelayController,
+        UdcStateMonitor,
+        UdevEventMonitor,
+    )
+
+    logger.debug("CLI args: %s", args)
+    if logger.isEnabledFor(DEBUG):
+        log_handlers_message = "Logging to stdout"
+        if args.log_to_file:
+            log_handlers_message += f" and to {args.log_path}"
+        logger.debug(log_handlers_message)
+    logger.info("Launching %s", VERSIONED_NAME)
 
     relaying_active = asyncio.Event()
-    relaying_active.clear()
 
     gadget_manager = GadgetManager()
-    gadget_manager.enable_gadgets()
-
-    shortcut_toggler = None
-    if args.interrupt_shortcut:
-        shortcut_keys = validate_shortcut(args.interrupt_shortcut)
-        if shortcut_keys:
-            logger.debug(f"Configuring global interrupt shortcut: {shortcut_keys}")
-            shortcut_toggler = ShortcutToggler(
-                shortcut_keys=shortcut_keys,
-                relaying_active=relaying_active,
-                gadget_manager=gadget_manager,
-            )
+    # Writing the ConfigFS gadget setup blocks; keep the loop and signals responsive
+    await asyncio.to_thread(gadget_manager.enable_gadgets)
 
-    relay_controller = RelayController(
-        gadget_manager=gadget_manager,
-        device_identifiers=args.device_ids,
-        auto_discover=args.auto_discover,
-        grab_devices=args.grab_devices,
-        relaying_active=relaying_active,
-        shortcut_toggler=shortcut_toggler,
-    )
-
-    udc_path = get_udc_path()
-    if udc_path is None:
-        logger.error("No UDC detected! USB Gadget mode may not be enabled.")
-        return
-    logger.debug(f"Detected UDC state file: {udc_path}")
-
-    async with (
-        UdevEventMonitor(relay_controller),
-        UdcStateMonitor(
+    try:
+        shortcut_toggler = create_shortcut_toggler(
+            args.interrupt_shortcut, relaying_active, gadget_manager
+        )
+
+        relay_controller = RelayController(
+            gadget_manager=gadget_manager,
+            device_identifiers=args.device_ids,
+            auto_discover=args.auto_discover,
+            grab_devices=args.grab_devices,
             relaying_active=relaying_active,
-            udc_path=udc_path,
-        ),
-    ):
-        relay_task = asyncio.create_task(relay_controller.async_relay_devices())
-        await shutdown_event.wait()
-
-        logger.debug("Shutdown event triggered. Cancelling relay task...")
-        relay_task.cancel()
-        await asyncio.gather(relay_task, return_exceptions=True)
+            shortcut_toggler=shortcut_toggler,
+        )
+
+        udc_path = get_udc_path()
+        if udc_path is None:
+            logger.error("No UDC detected! USB Gadget mode may not be enabled.")
+            return
+        logger.debug("Detected UDC state file: %s", udc_path)
+
+        async with (
+            UdevEventMonitor(relay_controller),
+            UdcStateMonitor(
+                relaying_active=relaying_active,
+                udc_path=udc_path,
+            ),
+            asyncio.TaskGroup() as task_group,
+        ):
+            relay_task = task_group.create_task(relay_controller.async_relay_devices())
+            await shutdown_event.wait()
+
+            logger.debug("Shutdown event triggered. Stopping relay controller...")
+            relay_controller.stop()
+            done, _ = await asyncio.wait({relay_task}, timeout=_SHUTDOWN_TIMEOUT)
+            if not done:
+                logger.warning("Relay controller did not stop in time. Cancelling...")
+                relay_task.cancel()
+    finally:
+        # Close the gadget device files before the atexit usb_hid.disable()
+        gadget_manager.close()
 
 
 async def async_list_devices():
@@ -131,8 +165,10 @@ async def async_list_devices():
     :return: None
     :raises SystemExit: Always exits after listing devices
     """
-    for dev in await async_list_input_devices():
-        print(f"{dev.name}\t{dev.uniq if dev.uniq else dev.phys}\t{dev.path}")
+    from src.bluetooth_2_usb.inputs import async_list_input_devices
+
+    async for dev in async_list_input_devices():
+        sys.stdout.write("%s\t%s\t%s\n" % (dev.name, dev.uniq or dev.phys, dev.path))
     exit_safely()
 
 
@@ -150,49 +186,72 @@ def print_version():
 def exit_safely():
     """
     Safely exits the script. Unregisters usb_hid.disable()
-    from atexit handlers to avoid potential exceptions.
+    from atexit handlers (if usb_hid was loaded) to avoid potential exceptions.
 
     :return: None
     :raises SystemExit: Always exits
     """
-    atexit.unregister(usb_hid.disable)
+    usb_hid = sys.modules.get("usb_hid")
+    if usb_hid is not None:
+        atexit.unregister(usb_hid.disable)
     sys.exit(0)
 
 
-def validate_shortcut(shortcut: list[str]) -> set[str]:
+def create_shortcut_toggler(
+    shortcut: list[str] | None,
+    relaying_active: asyncio.Event,
+    gadget_manager: "GadgetManager",
+) -> "ShortcutToggler | None":
     """
-    Convert a list of raw key strings (e.g. ["SHIFT", "CTRL", "Q"])
-    into a set of valid evdev-style names (e.g. {"KEY_LEFTSHIFT", "KEY_LEFTCTRL", "KEY_Q"}).
+    Create a ShortcutToggler for the given interrupt shortcut, if any.
 
-    :param shortcut: List of key strings to convert
-    :type shortcut: list[str]
-    :return: A set of normalized key names
-    :rtype: set[str]
+    :param shortcut: Raw key strings from the command line, or None if not configured
+    :param relaying_active: Event controlling whether relaying is active
+    :param gadget_manager: GadgetManager to release keyboard/mouse states on toggle
+    :return: A ShortcutToggler, or None if no valid shortcut was given
+    :rtype: ShortcutToggler | None
     """
-    ALIAS_MAP = {
-        "SHIFT": "LEFTSHIFT",
-        "LSHIFT": "LEFTSHIFT",
-        "RSHIFT": "RIGHTSHIFT",
-        "CTRL": "LEFTCTRL",
-        "LCTRL": "LEFTCTRL",
-        "RCTRL": "RIGHTCTRL",
-        "ALT": "LEFTALT",
-        "LALT": "LEFTALT",
-        "RALT": "RIGHTALT",
-        "GUI": "LEFTMETA",
-        "LMETA": "LEFTMETA",
-        "RMETA": "RIGHTMETA",
-    }
+    if not shortcut:
+        return None
 
+    shortcut_keys = validate_shortcut(tuple(shortcut))
+    if not shortcut_keys:
+        return None
+
+    from src.bluetooth_2_usb.relay import ShortcutToggler
+
+    logger.debug("Configuring global interrupt shortcut: %s", shortcut_keys)
+    return ShortcutToggler(
+        shortcut_keys=shortcut_keys,
+        relaying_active=relaying_active,
+        gadget_manager=gadget_manager,
+    )
+
+
+@lru_cache(maxsize=32)
+def validate_shortcut(shortcut: tuple[str, ...]) -> frozenset[str]:
+    """
+    Convert a tuple of raw key strings (e.g. ("SHIFT", "CTRL", "Q"))
+    into a set of valid evdev-style names (e.g. {"KEY_LEFTSHIFT", "KEY_LEFTCTRL", "KEY_Q"}).
+
+    The result is cached, hence immutable. Names are interned, so they are
+    identical to the attribute names found in ecodes.
+
+    :param shortcut: Tuple of key strings to convert
+    :type shortcut: tuple[str, ...]
+    :return: A frozenset of normalized key names
+    :rtype: frozenset[str]
+    """
     valid_keys = set()
     for raw_key in shortcut:
         key_upper = raw_key.strip().upper()
-        if key_upper in ALIAS_MAP:
-            key_upper = ALIAS_MAP[key_upper]
-        key_name = key_upper if key_upper.startswith("KEY_") else f"KEY_{key_upper}"
-        valid_keys.add(key_name)
+        key_upper = _ALIAS_MAP.get(key_upper, key_upper)
+        key_name = (
+            key_upper if key_upper.startswith(("KEY_", "BTN_")) else f"KEY_{key_upper}"
+        )
+        valid_keys.add(sys.intern(key_name))
 
-    return valid_keys
+    return frozenset(valid_keys)
 
 
 def get_udc_path() -> Path | None:
@@ -202,16 +261,18 @@ def get_udc_path() -> Path | None:
     :return: The path to the "state" file for the first UDC or None if not found
     :rtype: Path | None
     """
-    udc_root = Path("/sys/class/udc")
-
-    if not udc_root.exists() or not udc_root.is_dir():
+    try:
+        entries = os.scandir("/sys/class/udc")
+    except (FileNotFoundError, NotADirectoryError):
         return None
 
-    controllers = [entry for entry in udc_root.iterdir() if entry.is_dir()]
-    if not controllers:
-        return None
+    # Entries in /sys/class/udc are symlinks, so is_dir() has to follow them
+    with entries:
+        for entry in entries:
+            if entry.is_dir():
+                return Path(entry.path) / "state"
 
-    return controllers[0] / "state"
+    return None
 
 
 if __name__ == "__main__":
@@ -219,7 +280,10 @@ if __name__ == "__main__":
     Entry point for the script.
     """
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except Exception:
         logger.exception("Unhandled exception encountered. Aborting mission.")
         sys.exit(1)
@@ -2,20 +2,33 @@
 # Gather everything into a single, convenient namespace.
 # --------------------------------------------------------------------------
 
+from importlib import import_module
+
 from .args import Arguments, parse_args
-from .evdev import (
-    ecodes,
-    evdev_to_usb_hid,
-    find_key_name,
-    find_usage_name,
-    get_mouse_movement,
-    is_consumer_key,
-    is_mouse_button,
-)
 from .logging import add_file_handler, get_logger
-from .relay import (
-    DeviceIdentifier,
-    DeviceRelay,
-    RelayController,
-    async_list_input_devices,
-)
+
+# Names from the HID/relay modules are resolved on first access, so that light
+# entry points (e.g. --version) don't load usb_hid, adafruit_hid and pyudev.
+_LAZY_ATTRIBUTES = {
+    "ecodes": ".evdev",
+    "evdev_to_usb_hid": ".evdev",
+    "find_key_name": ".evdev",
+    "find_usage_name": ".evdev",
+    "get_key_route": ".evdev",
+    "get_mouse_movement": ".evdev",
+    "is_consumer_key": ".evdev",
+    "is_mouse_button": ".evdev",
+    "DeviceIdentifier": ".relay",
+    "DeviceRelay": ".relay",
+    "RelayController": ".relay",
+    "async_list_input_devices": ".inputs",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -3,8 +3,6 @@ import atexit
 import sys
 from typing import Optional
 
-import usb_hid
-
 
 class CustomArgumentParser(argparse.ArgumentParser):
     def __init__(self, *args, **kwargs) -> None:
@@ -101,7 +99,9 @@ class CustomArgumentParser(argparse.ArgumentParser):
         When the script is run with help or version flag, we need to unregister usb_hid.disable() from atexit
         because else an exception occurs if the script is already running, e.g. as service.
         """
-        atexit.unregister(usb_hid.disable)
+        usb_hid = sys.modules.get("usb_hid")
+        if usb_hid is not None:
+            atexit.unregister(usb_hid.disable)
         super().print_help()
 
 
@@ -2,7 +2,7 @@ from functools import lru_cache
 
 from adafruit_hid.consumer_control_code import ConsumerControlCode
 from adafruit_hid.keycode import Keycode, MouseButton
-from evdev import InputEvent, KeyEvent, RelEvent
+from evdev import InputEvent
 
 from .logging import get_logger
 
@@ -1313,7 +1313,7 @@ _EVDEV_TO_USB_HID: dict[int, int] = {
 """Mapping from evdev ecode to HID UsageID"""
 
 
-_CONSUMER_KEYS = set(
+_CONSUMER_KEYS = frozenset(
     (
         ecodes.KEY_POWER,
         ecodes.KEY_RESTART,
@@ -1463,7 +1463,7 @@ _CONSUMER_KEYS = set(
 """evdev scancodes that are mapped to USB HUT (HID Uage Table) UsageIDs from consumer page (0x0C)"""
 
 
-_MOUSE_BUTTONS = set(
+_MOUSE_BUTTONS = frozenset(
     (
         ecodes.BTN_LEFT,
         ecodes.BTN_RIGHT,
@@ -1473,22 +1473,52 @@ _MOUSE_BUTTONS = set(
 """Mouse button ecodes"""
 
 
-def evdev_to_usb_hid(event: KeyEvent) -> tuple[int | None, str | None]:
-    scancode: int = event.scancode
-    key_name = find_key_name(event)
+_KEY_ROUTES = bytes(
+    2 if code in _CONSUMER_KEYS else 1 if code in _MOUSE_BUTTONS else 0
+    for code in range(ecodes.KEY_CNT)
+)
+"""Target gadget by evdev key code: 0 = keyboard, 1 = mouse, 2 = consumer control"""
+
+_HID_CONVERSIONS: list[tuple[int | None, str | None] | None] = [None] * ecodes.KEY_CNT
+"""(HID UsageID, name) by evdev scancode, filled in as scancodes are first seen"""
+
+
+def evdev_to_usb_hid(event: InputEvent) -> tuple[int | None, str | None]:
+    scancode = event.code
+    conversion = _HID_CONVERSIONS[scancode]
+    if conversion is None:
+        conversion = _HID_CONVERSIONS[scancode] = _evdev_to_usb_hid(scancode)
+    return conversion
+
+
+def find_key_name(event: InputEvent) -> str | None:
+    return _find_key_name(event.code)
+
+
+def find_usage_name(event: InputEvent, hid_usage_id: int | None) -> str | None:
+    return _find_usage_name(_get_hid_code_type(event.code), hid_usage_id)
+
+
+# The mappings are static, so each scancode is resolved (and logged) only once
+def _evdev_to_usb_hid(scancode: int) -> tuple[int | None, str | None]:
+    key_name = _find_key_name(scancode)
     hid_usage_id = _EVDEV_TO_USB_HID.get(scancode, None)
-    hid_usage_name = find_usage_name(event, hid_usage_id)
+    hid_usage_name = _find_usage_name(_get_hid_code_type(scancode), hid_usage_id)
     if any(item is None for item in (key_name, hid_usage_id, hid_usage_name)):
-        _logger.warning(f"Unsupported key pressed: 0x{scancode:02X}")
+        _logger.warning("Unsupported key pressed: 0x%02X", scancode)
     else:
         _logger.debug(
-            f"Converted evdev scancode 0x{scancode:02X} ({key_name}) to HID UsageID 0x{hid_usage_id:02X} ({hid_usage_name})"
+            "Converted evdev scancode 0x%02X (%s) to HID UsageID 0x%02X (%s)",
+            scancode,
+            key_name,
+            hid_usage_id,
+            hid_usage_name,
         )
     return hid_usage_id, hid_usage_name
 
 
-def find_key_name(event: KeyEvent) -> str | None:
-    scancode: int = event.scancode
+@lru_cache(maxsize=1024)
+def _find_key_name(scancode: int) -> str | None:
     for attribute in _cached_dir(ecodes):
         if _cached_getattr(ecodes, attribute) == scancode and attribute.startswith(
             ("KEY_", "BTN_")
@@ -1497,8 +1527,8 @@ def find_key_name(event: KeyEvent) -> str | None:
     return None
 
 
-def find_usage_name(event: KeyEvent, hid_usage_id: int | None) -> str | None:
-    code_type = _get_hid_code_type(event)
+@lru_cache(maxsize=1024)
+def _find_usage_name(code_type: type, hid_usage_id: int | None) -> str | None:
     for attribute in _cached_dir(code_type):
         if _cached_getattr(code_type, attribute) == hid_usage_id:
             return attribute
@@ -1518,30 +1548,33 @@ def _cached_dir(
 
 
 def _get_hid_code_type(
-    event: KeyEvent,
+    scancode: int,
 ) -> type[ConsumerControlCode] | type[Keycode] | type[MouseButton]:
-    if is_consumer_key(event):
+    if scancode in _CONSUMER_KEYS:
         return ConsumerControlCode
-    elif is_mouse_button(event):
+    elif scancode in _MOUSE_BUTTONS:
         return MouseButton
     return Keycode
 
 
-def is_mouse_button(event: KeyEvent) -> bool:
-    return event.scancode in _MOUSE_BUTTONS
+def is_mouse_button(event: InputEvent) -> bool:
+    return event.code in _MOUSE_BUTTONS
+
+
+def is_consumer_key(event: InputEvent) -> bool:
+    return event.code in _CONSUMER_KEYS
 
 
-def is_consumer_key(event: KeyEvent) -> bool:
-    return event.scancode in _CONSUMER_KEYS
+def get_key_route(event: InputEvent) -> int:
+    return _KEY_ROUTES[event.code]
 
 
-def get_mouse_movement(event: RelEvent) -> tuple[int, int, int]:
-    input_event: InputEvent = event.event
+def get_mouse_movement(event: InputEvent) -> tuple[int, int, int]:
     x, y, mwheel = 0, 0, 0
-    if input_event.code == ecodes.REL_X:
-        x = input_event.value
-    elif input_event.code == ecodes.REL_Y:
-        y = input_event.value
-    elif input_event.code == ecodes.REL_WHEEL:
-        mwheel = input_event.value
+    if event.code == ecodes.REL_X:
+        x = event.value
+    elif event.code == ecodes.REL_Y:
+        y = event.value
+    elif event.code == ecodes.REL_WHEEL:
+        mwheel = event.value
     return x, y, mwheel
@@ -0,0 +1,48 @@
+import asyncio
+from typing import AsyncIterator
+
+from evdev import InputDevice, list_devices
+
+from .logging import get_logger
+
+_logger = get_logger()
+
+
+async def async_list_input_devices() -> AsyncIterator[InputDevice]:
+    """
+    Yield the available /dev/input/event* devices.
+
+    Listing and opening the devices blocks, so all of them are opened in a
+    worker thread first, and the resulting list is then yielded from the
+    event loop. Devices that vanish or cannot be opened are skipped.
+
+    :return: Async iterator of InputDevice objects
+    :rtype: AsyncIterator[InputDevice]
+    """
+    for device in await asyncio.to_thread(_open_input_devices):
+        yield device
+
+
+def _open_input_devices() -> list[InputDevice]:
+    """
+    Open all available /dev/input/event* devices.
+
+    :return: The devices that could be opened
+    :rtype: list[InputDevice]
+    """
+    try:
+        device_paths = list_devices()
+    except (OSError, FileNotFoundError) as ex:
+        _logger.critical(f"Failed listing devices: {ex}")
+        return []
+    except Exception:
+        _logger.exception("Unexpected error listing devices")
+        return []
+
+    devices = []
+    for path in device_paths:
+        try:
+            devices.append(InputDevice(path))
+        except (OSError, FileNotFoundError) as ex:
+            _logger.debug("Skipping %s: %s", path, ex)
+    return devices
@@ -1,47 +1,90 @@
 import asyncio
 from asyncio import Task, TaskGroup
+from functools import cache, partial
+from logging import DEBUG
+import os
 from pathlib import Path
 import re
-from typing import Optional, Union
+import select
+import struct
+from typing import Any, AsyncIterator, Callable, Optional, Union
 
 from adafruit_hid.consumer_control import ConsumerControl
 from adafruit_hid.keyboard import Keyboard
 from adafruit_hid.mouse import Mouse
-from evdev import InputDevice, InputEvent, KeyEvent, RelEvent, categorize, list_devices
+from evdev import InputDevice, InputEvent, KeyEvent, categorize
 import pyudev
 import usb_hid
 from usb_hid import Device
 
 from .evdev import (
+    ecodes,
     evdev_to_usb_hid,
-    find_key_name,
+    get_key_route,
     get_mouse_movement,
-    is_consumer_key,
-    is_mouse_button,
 )
+from .inputs import async_list_input_devices
 from .logging import get_logger
 
 _logger = get_logger()
 
+_INPUT_PATH_PREFIX = "/dev/input/event"
+_MAC_REGEX = re.compile(r"^([0-9a-fA-F]{2}[:-]){5}([0-9a-fA-F]{2})$")
+
+_INPUT_EVENT = struct.Struct("llHHi")
+"""Layout of the kernel's struct input_event: sec, usec, type, code, value"""
+_READ_BATCH_SIZE = 64
+"""Maximum number of events read from a device at once"""
+_WRITE_QUEUE_SIZE = 256
+"""Maximum number of HID writes queued per device before reading pauses"""
+_RETRY_DELAYS = tuple(min(0.00025 * 4**i, 0.1) for i in range(7))
+"""Exponential backoff between retries of a blocked HID write, in seconds"""
+_UDC_REOPEN_INTERVAL = 0.5
+"""Delay before reopening a missing or vanished UDC state file, in seconds"""
+
+KeyActions = tuple[Callable[[int], None], Callable[[int], None]]
+"""Bound press and release methods of a HID gadget"""
+Gadget = Union[ConsumerControl, Keyboard, Mouse]
+"""A USB HID gadget"""
+
 
 class GadgetManager:
     """
     Manages enabling, disabling, and references to USB HID gadget devices.
 
-    :ivar _gadgets: Internal dictionary mapping device types to HID device objects
+    :ivar _keyboard: The Keyboard gadget
+    :ivar _mouse: The Mouse gadget
+    :ivar _consumer: The ConsumerControl gadget
     :ivar _enabled: Indicates whether the gadgets have been enabled
+    :ivar _key_actions: Bound (press, release) pairs of the keyboard, mouse
+        and consumer gadgets, indexed by get_key_route()
+    :ivar _hid_fds: Non-blocking descriptors of the gadget device files by
+        gadget, used to wait for the endpoints to become writable
+    :ivar _writable: Futures resolved once a descriptor becomes writable,
+        shared by all waiters on that descriptor
     """
 
+    __slots__ = (
+        "_keyboard",
+        "_mouse",
+        "_consumer",
+        "_enabled",
+        "_key_actions",
+        "_hid_fds",
+        "_writable",
+    )
+
     def __init__(self) -> None:
         """
         Initialize without enabling devices. Call enable_gadgets() to enable them.
         """
-        self._gadgets = {
-            "keyboard": None,
-            "mouse": None,
-            "consumer": None,
-        }
+        self._keyboard: Optional[Keyboard] = None
+        self._mouse: Optional[Mouse] = None
+        self._consumer: Optional[ConsumerControl] = None
         self._enabled = False
+        self._key_actions: tuple[KeyActions, ...] = ()
+        self._hid_fds: dict[Gadget, int] = {}
+        self._writable: dict[int, asyncio.Future[None]] = {}
 
     def enable_gadgets(self) -> None:
         """
@@ -51,17 +94,32 @@ class GadgetManager:
         try:
             usb_hid.disable()
         except Exception as ex:
-            _logger.debug(f"usb_hid.disable() failed or was already disabled: {ex}")
+            _logger.debug("usb_hid.disable() failed or was already disabled: %s", ex)
 
         usb_hid.enable([Device.BOOT_MOUSE, Device.KEYBOARD, Device.CONSUMER_CONTROL])  # type: ignore
         enabled_devices = list(usb_hid.devices)  # type: ignore
 
-        self._gadgets["keyboard"] = Keyboard(enabled_devices)
-        self._gadgets["mouse"] = Mouse(enabled_devices)
-        self._gadgets["consumer"] = ConsumerControl(enabled_devices)
+        keyboard = Keyboard(enabled_devices)
+        mouse = Mouse(enabled_devices)
+        consumer = ConsumerControl(enabled_devices)
+        self._keyboard = keyboard
+        self._mouse = mouse
+        self._consumer = consumer
+        self._key_actions = (
+            (keyboard.press, keyboard.release),
+            (mouse.press, mouse.release),
+            (consumer.press, consumer.release),
+        )
+        self._open_hid_fds(
+            {
+                keyboard: Device.KEYBOARD,
+                mouse: Device.BOOT_MOUSE,
+                consumer: Device.CONSUMER_CONTROL,
+            }
+        )
         self._enabled = True
 
-        _logger.debug(f"USB HID gadgets re-initialized: {enabled_devices}")
+        _logger.debug("USB HID gadgets re-initialized: %s", enabled_devices)
 
     def get_keyboard(self) -> Optional[Keyboard]:
         """
@@ -70,7 +128,7 @@ class GadgetManager:
         :return: A Keyboard object, or None if not initialized
         :rtype: Keyboard | None
         """
-        return self._gadgets["keyboard"]
+        return self._keyboard
 
     def get_mouse(self) -> Optional[Mouse]:
         """
@@ -79,7 +137,7 @@ class GadgetManager:
         :return: A Mouse object, or None if not initialized
         :rtype: Mouse | None
         """
-        return self._gadgets["mouse"]
+        return self._mouse
 
     def get_consumer(self) -> Optional[ConsumerControl]:
         """
@@ -88,7 +146,91 @@ class GadgetManager:
         :return: A ConsumerControl object, or None if not initialized
         :rtype: ConsumerControl | None
         """
-        return self._gadgets["consumer"]
+        return self._consumer
+
+    async def async_wait_writable(
+        self, gadget: Optional[Gadget], timeout: float
+    ) -> None:
+        """
+        Wait until the endpoint of the given gadget accepts writes again, or
+        until the timeout expires. Sleeps for the timeout if the gadget's
+        device file is not available.
+
+        All waiters on one endpoint share a single writer registration, so
+        they are all woken as soon as it becomes writable.
+
+        :param gadget: The Keyboard, Mouse or ConsumerControl whose write blocked
+        :param timeout: Maximum time to wait in seconds
+        """
+        fd = self._hid_fds.get(gadget)
+        if fd is None:
+            await asyncio.sleep(timeout)
+            return
+        future = self._writable.get(fd)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._writable[fd] = future
+            loop.add_writer(fd, self._on_writable, fd)
+        try:
+            async with asyncio.timeout(timeout):
+                # Shielded, so a waiter timing out doesn't cancel the shared future
+                await asyncio.shield(future)
+        except TimeoutError:
+            pass
+
+    def close(self) -> None:
+        """
+        Wake all writability waiters and close the gadget device files.
+        Call this before usb_hid.disable() tears down the gadget.
+        """
+        for fd, future in self._writable.items():
+            future.get_loop().remove_writer(fd)
+            future.set_result(None)
+        self._writable.clear()
+        for fd in self._hid_fds.values():
+            os.close(fd)
+        self._hid_fds.clear()
+
+    def _on_writable(self, fd: int) -> None:
+        """
+        Loop callback invoked once a gadget device file is writable.
+        Unregisters the descriptor and wakes all of its waiters.
+
+        :param fd: The writable file descriptor
+        """
+        future = self._writable.pop(fd)
+        future.get_loop().remove_writer(fd)
+        future.set_result(None)
+
+    def _open_hid_fds(self, devices: dict[Gadget, Device]) -> None:
+        """
+        (Re-)open the device files of the given gadgets' HID devices
+        in non-blocking mode.
+
+        :param devices: The enabled usb_hid device of each gadget
+        """
+        self.close()
+        for gadget, device in devices.items():
+            path = getattr(device, "path", None)
+            if path is None:
+                continue
+            try:
+                self._hid_fds[gadget] = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as ex:
+                _logger.debug("Cannot watch %s for writability: %s", path, ex)
+
+    def get_key_actions(self, event: InputEvent) -> Optional[KeyActions]:
+        """
+        Get the bound press and release methods of the gadget that handles
+        the given key event.
+
+        :param event: The EV_KEY InputEvent to route
+        :return: A (press, release) tuple, or None if not initialized
+        """
+        if not self._key_actions:
+            return None
+        return self._key_actions[get_key_route(event)]
 
 
 class ShortcutToggler:
@@ -98,7 +240,7 @@ class ShortcutToggler:
 
     def __init__(
         self,
-        shortcut_keys: set[str],
+        shortcut_keys: frozenset[str],
         relaying_active: asyncio.Event,
         gadget_manager: GadgetManager,
     ) -> None:
@@ -111,25 +253,45 @@ class ShortcutToggler:
         self.relaying_active = relaying_active
         self.gadget_manager = gadget_manager
 
-        self.currently_pressed: set[str] = set()
+        # Key codes are small ints, so shortcut and held keys are tracked as bitmasks
+        self._shortcut_mask = 0
+        for key_name in shortcut_keys:
+            code = getattr(ecodes, key_name, None)
+            if not isinstance(code, int):
+                _logger.warning("Unknown shortcut key %s; shortcut disabled.", key_name)
+                self._shortcut_mask = 0
+                break
+            self._shortcut_mask |= 1 << code
+        self._pressed_mask = 0
+
+    @property
+    def disabled(self) -> bool:
+        """
+        True if there is no valid shortcut, so key events can never toggle relaying.
+
+        :return: Whether the shortcut is disabled
+        :rtype: bool
+        """
+        return not self._shortcut_mask
 
-    def handle_key_event(self, event: KeyEvent) -> None:
+    def handle_key_event(self, event: InputEvent) -> None:
         """
         Process a key press or release to detect the toggle shortcut.
 
-        :param event: The incoming KeyEvent from evdev
-        :type event: KeyEvent
+        :param event: The incoming EV_KEY InputEvent from evdev
+        :type event: InputEvent
         """
-        key_name = find_key_name(event)
-        if key_name is None:
+        key_bit = 1 << event.code
+        if not key_bit & self._shortcut_mask:
             return
 
-        if event.keystate == KeyEvent.key_down:
-            self.currently_pressed.add(key_name)
-        elif event.keystate == KeyEvent.key_up:
-            self.currently_pressed.discard(key_name)
+        if event.value == KeyEvent.key_down:
+            self._pressed_mask |= key_bit
+        elif event.value == KeyEvent.key_up:
+            self._pressed_mask &= ~key_bit
 
-        if self.shortcut_keys and self.shortcut_keys.issubset(self.currently_pressed):
+        # Only shortcut keys are tracked, so all of them are held once the masks match
+        if self._pressed_mask == self._shortcut_mask:
             self.toggle_relaying()
 
     def toggle_relaying(self) -> None:
@@ -144,7 +306,7 @@ class ShortcutToggler:
             if mouse:
                 mouse.release_all()
 
-            self.currently_pressed.clear()
+            self._pressed_mask = 0
             self.relaying_active.clear()
             _logger.info("ShortcutToggler: Relaying is now OFF.")
         else:
@@ -179,22 +341,35 @@ class RelayController:
         """
         self._gadget_manager = gadget_manager
         self._device_ids = [DeviceIdentifier(id) for id in (device_identifiers or [])]
+        self._id_paths = {
+            i.normalized_value for i in self._device_ids if i.type == "path"
+        }
+        self._id_macs = {
+            i.normalized_value for i in self._device_ids if i.type == "mac"
+        }
+        id_names = [i.normalized_value for i in self._device_ids if i.type == "name"]
+        # All name fragments are searched for in a single pass over the device name
+        self._id_name_regex = (
+            re.compile("|".join(map(re.escape, id_names))) if id_names else None
+        )
         self._auto_discover = auto_discover
-        self._skip_name_prefixes = skip_name_prefixes or ["vc4-hdmi"]
+        self._skip_name_prefixes = tuple(
+            prefix.lower() for prefix in (skip_name_prefixes or ["vc4-hdmi"])
+        )
         self._grab_devices = grab_devices
         self._relaying_active = relaying_active
         self._shortcut_toggler = shortcut_toggler
 
         self._active_tasks: dict[str, Task] = {}
         self._task_group: Optional[TaskGroup] = None
-        self._cancelled = False
+        self._stop_event = asyncio.Event()
 
     async def async_relay_devices(self) -> None:
         """
         Launch a TaskGroup that relays events from all matching devices.
         Dynamically adds or removes tasks when devices appear or disappear.
 
-        :return: Never returns unless an unrecoverable exception or cancellation occurs
+        :return: Returns after stop() was called, an unrecoverable exception or cancellation
         :rtype: None
         """
         try:
@@ -202,13 +377,15 @@ class RelayController:
                 self._task_group = task_group
                 _logger.debug("RelayController: TaskGroup started.")
 
-                for device in await async_list_input_devices():
+                async for device in async_list_input_devices():
                     if self._should_relay(device):
                         self.add_device(device.path)
 
-                # Keep running unless canceled
-                while not self._cancelled:
-                    await asyncio.sleep(0.1)
+                # Keep running until stopped or cancelled
+                await self._stop_event.wait()
+                _logger.debug("RelayController: Stopping device relays.")
+                for task in list(self._active_tasks.values()):
+                    task.cancel()
         except* Exception as exc_grp:
             _logger.exception(
                 "RelayController: Exception in TaskGroup", exc_info=exc_grp
@@ -217,35 +394,43 @@ class RelayController:
             self._task_group = None
             _logger.debug("RelayController: TaskGroup exited.")
 
+    def stop(self) -> None:
+        """
+        Request async_relay_devices() to cancel all device relays and return.
+        """
+        self._stop_event.set()
+
     def add_device(self, device_path: str) -> None:
         """
         Add a device by path. If a TaskGroup is active, create a new relay task.
 
         :param device_path: The absolute path to the input device (e.g., /dev/input/event5)
         """
-        if not Path(device_path).exists():
-            _logger.debug(f"{device_path} does not exist.")
+        if self._task_group is None:
+            _logger.critical(f"No TaskGroup available; ignoring {device_path}.")
             return
 
-        try:
-            device = InputDevice(device_path)
-        except (OSError, FileNotFoundError):
-            _logger.debug(f"{device_path} vanished before opening.")
+        if self._stop_event.is_set():
+            _logger.debug("Stopping; ignoring %s.", device_path)
             return
 
-        if self._task_group is None:
-            _logger.critical(f"No TaskGroup available; ignoring {device}.")
+        if device_path in self._active_tasks:
+            _logger.debug("Device %s is already active.", device_path)
             return
 
-        if device.path in self._active_tasks:
-            _logger.debug(f"Device {device} is already active.")
+        # Opening the device doubles as the existence check
+        try:
+            device = InputDevice(device_path)
+        except (OSError, FileNotFoundError):
+            _logger.debug("%s does not exist or vanished before opening.", device_path)
             return
 
         task = self._task_group.create_task(
             self._async_relay_events(device), name=device.path
         )
         self._active_tasks[device.path] = task
-        _logger.debug(f"Created task for {device}.")
+        task.add_done_callback(partial(self._forget_task, device.path))
+        _logger.debug("Created task for %s.", device)
 
     def remove_device(self, device_path: str) -> None:
         """
@@ -256,9 +441,20 @@ class RelayController:
         task = self._active_tasks.pop(device_path, None)
         if task and not task.done():
             task.cancel()
-            _logger.debug(f"Cancelled relay for {device_path}.")
+            _logger.debug("Cancelled relay for %s.", device_path)
         else:
-            _logger.debug(f"No active task found for {device_path} to remove.")
+            _logger.debug("No active task found for %s to remove.", device_path)
+
+    def _forget_task(self, device_path: str, task: Task) -> None:
+        """
+        Done callback dropping a finished relay task, unless the device path
+        was taken over by a newer task in the meantime.
+
+        :param device_path: The path of the relayed device
+        :param task: The finished relay task
+        """
+        if self._active_tasks.get(device_path) is task:
+            del self._active_tasks[device_path]
 
     async def _async_relay_events(self, device: InputDevice) -> None:
         """
@@ -280,8 +476,6 @@ class RelayController:
             _logger.info(f"Lost connection to {device}.")
         except Exception:
             _logger.exception(f"Unhandled exception in relay for {device}.")
-        finally:
-            self.remove_device(device.path)
 
     def _should_relay(self, device: InputDevice) -> bool:
         """
@@ -292,14 +486,21 @@ class RelayController:
         :return: True if we should relay it, False otherwise
         :rtype: bool
         """
-        name_lower = device.name.lower()
+        # Each check only lowercases what it needs, and only if it has anything to match
         if self._auto_discover:
-            for prefix in self._skip_name_prefixes:
-                if name_lower.startswith(prefix.lower()):
-                    return False
-            return True
+            return not (
+                self._skip_name_prefixes
+                and device.name.lower().startswith(self._skip_name_prefixes)
+            )
 
-        return any(identifier.matches(device) for identifier in self._device_ids)
+        if device.path in self._id_paths:
+            return True
+        if self._id_macs and (device.uniq or "").lower() in self._id_macs:
+            return True
+        return (
+            self._id_name_regex is not None
+            and self._id_name_regex.search(device.name.lower()) is not None
+        )
 
 
 class DeviceRelay:
@@ -307,6 +508,8 @@ class DeviceRelay:
     Relay a single InputDevice's events to USB HID gadgets.
 
     - Optionally grabs the device exclusively.
+    - Writes to the HID gadgets from a separate task, so blocked writes
+      don't hold up reading the device.
     - Retries HID writes if they raise BlockingIOError.
     """
 
@@ -329,9 +532,21 @@ class DeviceRelay:
         self._gadget_manager = gadget_manager
         self._grab_device = grab_device
         self._relaying_active = relaying_active
+        # A disabled toggler never fires, so don't feed it key events
+        if shortcut_toggler is not None and shortcut_toggler.disabled:
+            shortcut_toggler = None
         self._shortcut_toggler = shortcut_toggler
 
+        # Gadgets are enabled before any relay is created, so bind the mouse once
+        mouse = gadget_manager.get_mouse()
+        if mouse is None:
+            raise RuntimeError("Mouse gadget not initialized or manager not enabled.")
+        self._mouse = mouse
+        self._move_mouse = mouse.move
+
         self._currently_grabbed = False
+        self._write_queue: asyncio.Queue[tuple] = asyncio.Queue(_WRITE_QUEUE_SIZE)
+        self._writer_task: Optional[Task] = None
 
     def __str__(self) -> str:
         return f"relay for {self._input_device}"
@@ -348,7 +563,8 @@ class DeviceRelay:
 
     async def __aenter__(self) -> "DeviceRelay":
         """
-        Async context manager entry. Grabs the device if requested.
+        Async context manager entry. Grabs the device if requested
+        and starts the HID writer task.
 
         :return: self
         """
@@ -358,14 +574,25 @@ class DeviceRelay:
                 self._currently_grabbed = True
             except Exception as ex:
                 _logger.warning(f"Could not grab {self._input_device.path}: {ex}")
+        self._writer_task = asyncio.create_task(
+            self._async_write_loop(), name=f"{self._input_device.path} writer"
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
         """
-        Async context manager exit. Ungrabs the device if we grabbed it.
+        Async context manager exit. Stops the HID writer task and
+        ungrabs the device if we grabbed it.
 
         :return: False to propagate exceptions
         """
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
         if self._grab_device:
             try:
                 self._input_device.ungrab()
@@ -376,65 +603,204 @@ class DeviceRelay:
 
     async def async_relay_events_loop(self) -> None:
         """
-        Continuously read events from the device and relay them
-        to the USB HID gadgets. Stops when canceled or on error.
+        Continuously read events from the device and queue them for
+        the HID writer task. Stops when canceled or on error.
+
+        Consecutive relative movements are summed up and sent as a single
+        mouse report once a different event arrives. Since evdev terminates
+        every frame with SYN_REPORT, X/Y/wheel deltas of one frame end up in
+        one HID report while key events keep their order.
 
         :return: None
         """
-        async for input_event in self._input_device.async_read_loop():
-            event = categorize(input_event)
+        debug = _logger.isEnabledFor(DEBUG)
+        x_total, y_total, mwheel_total = 0, 0, 0
+        async for sec, usec, event_type, code, value in self._async_read_events():
+            handler = _EVENT_HANDLERS.get(event_type)
+            if handler is None and event_type != ecodes.EV_SYN:
+                # Nothing to relay, e.g. EV_MSC scan codes sent along with key events
+                continue
+
+            # Relative motion is summed up from the raw fields, so only key events
+            # (or events that get logged) need an InputEvent
+            event = None
+            if event_type == ecodes.EV_KEY or (debug and handler is not None):
+                event = InputEvent(sec, usec, event_type, code, value)
 
-            if any(isinstance(event, ev_type) for ev_type in [KeyEvent, RelEvent]):
+            # Only wrap the raw event for its readable representation if it gets logged
+            if debug and handler is not None:
                 _logger.debug(
-                    f"Received {event} from {self._input_device.name} ({self._input_device.path})"
+                    "Received %s from %s (%s)",
+                    categorize(event),
+                    self._input_device.name,
+                    self._input_device.path,
                 )
 
-            if self._shortcut_toggler and isinstance(event, KeyEvent):
+            if self._shortcut_toggler and event_type == ecodes.EV_KEY:
                 self._shortcut_toggler.handle_key_event(event)
 
-            active = self._relaying_active and self._relaying_active.is_set()
+            active = self._is_relaying_active()
 
             # Dynamically grab/ungrab if relaying state changes
-            if self._grab_device and active and not self._currently_grabbed:
-                try:
-                    self._input_device.grab()
-                    self._currently_grabbed = True
-                    _logger.debug(f"Grabbed {self._input_device}")
-                except Exception as ex:
-                    _logger.warning(f"Could not grab {self._input_device}: {ex}")
-
-            elif self._grab_device and not active and self._currently_grabbed:
-                try:
-                    self._input_device.ungrab()
-                    self._currently_grabbed = False
-                    _logger.debug(f"Ungrabbed {self._input_device}")
-                except Exception as ex:
-                    _logger.warning(f"Could not ungrab {self._input_device}: {ex}")
+            if self._grab_device and active is not self._currently_grabbed:
+                self._update_grab(active)
 
             if not active:
+                x_total, y_total, mwheel_total = 0, 0, 0
+                # Writes queued before relaying was switched off must not follow
+                # the gadgets' release_all()
+                while not self._write_queue.empty():
+                    self._write_queue.get_nowait()
+                continue
+
+            if event_type == ecodes.EV_REL:
+                if code == ecodes.REL_X:
+                    x_total += value
+                elif code == ecodes.REL_Y:
+                    y_total += value
+                elif code == ecodes.REL_WHEEL:
+                    mwheel_total += value
                 continue
 
-            await self._process_event_with_retry(event)
+            if x_total or y_total or mwheel_total:
+                await self._write_queue.put(
+                    (self._move_mouse, x_total, y_total, mwheel_total)
+                )
+                x_total, y_total, mwheel_total = 0, 0, 0
+
+            if handler is not None:
+                await self._write_queue.put((handler, event, self._gadget_manager))
 
-    async def _process_event_with_retry(self, event: InputEvent) -> None:
+    def _is_relaying_active(self) -> bool:
         """
-        Attempt to relay the given event to the appropriate HID gadget.
-        Retry on BlockingIOError up to 2 times.
+        :return: True if events should currently be relayed to the host
+        :rtype: bool
+        """
+        return bool(self._relaying_active and self._relaying_active.is_set())
 
-        :param event: The InputEvent to process
+    def _update_grab(self, grab: bool) -> None:
         """
-        max_tries = 3
-        retry_delay = 0.1
+        Grab or ungrab the input device to follow the relaying state.
+
+        :param grab: True to grab the device, False to release it
+        """
+        try:
+            if grab:
+                self._input_device.grab()
+                _logger.debug("Grabbed %s", self._input_device)
+            else:
+                self._input_device.ungrab()
+                _logger.debug("Ungrabbed %s", self._input_device)
+            self._currently_grabbed = grab
+        except Exception as ex:
+            _logger.warning(
+                "Could not %s %s: %s",
+                "grab" if grab else "ungrab",
+                self._input_device,
+                ex,
+            )
+
+    async def _async_write_loop(self) -> None:
+        """
+        Perform the queued HID writes in order until cancelled.
+
+        Mouse movements queued back to back, e.g. while a previous write was
+        blocked, are merged into a single report before being written.
+
+        Writes dequeued while relaying is off are dropped: the shortcut toggler
+        has already released all keys, and a broken pipe would only fail again.
+        """
+        queue = self._write_queue
+        pending: Optional[tuple] = None
+        while True:
+            if pending is None:
+                relay, *args = await queue.get()
+            else:
+                relay, *args = pending
+                pending = None
+
+            if not self._is_relaying_active():
+                continue
+
+            if relay is self._move_mouse:
+                x, y, mwheel = args
+                while not queue.empty():
+                    item = queue.get_nowait()
+                    if item[0] is not self._move_mouse:
+                        pending = item
+                        break
+                    x += item[1]
+                    y += item[2]
+                    mwheel += item[3]
+                args = [x, y, mwheel]
+
+            await self._relay_with_retry(relay, *args)
+
+    async def _async_read_events(
+        self,
+    ) -> AsyncIterator[tuple[int, int, int, int, int]]:
+        """
+        Yield the device's raw events, draining everything queued each time
+        its fd becomes readable.
+
+        The fd is watched by the event loop directly, and every wakeup drains
+        the device until it would block, so a burst of kernel events costs a
+        single loop callback instead of one per event. The fd is only watched
+        while waiting, so a consumer stalled on a full write queue doesn't make
+        the loop spin on a readable fd.
+
+        Events are unpacked straight from the kernel's struct input_event,
+        without creating an InputEvent object per event.
+
+        :return: An async iterator over (sec, usec, type, code, value) tuples
+        """
+        loop = asyncio.get_running_loop()
+        readable = asyncio.Event()
+        fd = self._input_device.fd
+        while True:
+            loop.add_reader(fd, readable.set)
+            try:
+                await readable.wait()
+            finally:
+                loop.remove_reader(fd)
+            readable.clear()
+            while True:
+                try:
+                    data = os.read(fd, _INPUT_EVENT.size * _READ_BATCH_SIZE)
+                except BlockingIOError:
+                    break
+                for event in _INPUT_EVENT.iter_unpack(data):
+                    yield event
+
+    async def _relay_with_retry(self, relay: Callable[..., None], *args: Any) -> None:
+        """
+        Attempt to write to the appropriate HID gadget by calling relay(*args).
+        Retry on BlockingIOError with exponential backoff, or as soon as the
+        blocked gadget is writable again.
+
+        :param relay: Function writing to the gadgets, e.g. relay_event or Mouse.move
+        :param args: Arguments to relay, e.g. the InputEvent and GadgetManager
+        """
+        max_tries = len(_RETRY_DELAYS) + 1
         for attempt in range(1, max_tries + 1):
             try:
-                relay_event(event, self._gadget_manager)
+                relay(*args)
                 return
             except BlockingIOError:
                 if attempt < max_tries:
-                    _logger.debug(f"HID write blocked ({attempt}/{max_tries})")
-                    await asyncio.sleep(retry_delay)
+                    _logger.debug("HID write blocked (%d/%d)", attempt, max_tries)
+                    if relay is self._move_mouse:
+                        gadget = self._mouse
+                    else:
+                        gadget = get_output_device(args[0], self._gadget_manager)
+                    await self._gadget_manager.async_wait_writable(
+                        gadget, _RETRY_DELAYS[attempt - 1]
+                    )
+                    # Relaying may have been switched off while waiting
+                    if not self._is_relaying_active():
+                        return
                 else:
-                    _logger.warning(f"HID write blocked ({attempt}/{max_tries})")
+                    _logger.warning("HID write blocked (%d/%d)", attempt, max_tries)
             except BrokenPipeError:
                 _logger.warning(
                     "BrokenPipeError: USB cable likely disconnected or power-only. "
@@ -445,7 +811,11 @@ class DeviceRelay:
                     self._relaying_active.clear()
                 return
             except Exception:
-                _logger.exception(f"Error processing {event}")
+                # Motion is relayed as deltas, everything else as (event, manager)
+                relayed = args if relay is self._move_mouse else args[0]
+                _logger.exception(
+                    "Error processing %s via %s", relayed, relay.__qualname__
+                )
                 return
 
 
@@ -466,10 +836,29 @@ class DeviceIdentifier:
     def __str__(self) -> str:
         return f'{self._type} "{self._value}"'
 
+    @property
+    def type(self) -> str:
+        """
+        The kind of identifier: "path", "mac" or "name".
+
+        :rtype: str
+        """
+        return self._type
+
+    @property
+    def normalized_value(self) -> str:
+        """
+        The identifier value as compared against devices.
+
+        :rtype: str
+        """
+        return self._normalized_value
+
     def _determine_identifier_type(self) -> str:
-        if re.match(r"^/dev/input/event.*$", self._value):
+        if self._value.startswith(_INPUT_PATH_PREFIX):
             return "path"
-        if re.match(r"^([0-9a-fA-F]{2}[:-]){5}([0-9a-fA-F]{2})$", self._value):
+        # A MAC address always has 17 characters, so most names skip the regex
+        if len(self._value) == 17 and _MAC_REGEX.match(self._value):
             return "mac"
         return "name"
 
@@ -495,23 +884,6 @@ class DeviceIdentifier:
         return self._normalized_value in device.name.lower()
 
 
-async def async_list_input_devices() -> list[InputDevice]:
-    """
-    Return a list of available /dev/input/event* devices.
-
-    :return: List of InputDevice objects
-    :rtype: list[InputDevice]
-    """
-    try:
-        return [InputDevice(path) for path in list_devices()]
-    except (OSError, FileNotFoundError) as ex:
-        _logger.critical(f"Failed listing devices: {ex}")
-        return []
-    except Exception:
-        _logger.exception("Unexpected error listing devices")
-        return []
-
-
 def relay_event(event: InputEvent, gadget_manager: GadgetManager) -> None:
     """
     Relay the given event to the appropriate USB HID device.
@@ -520,17 +892,16 @@ def relay_event(event: InputEvent, gadget_manager: GadgetManager) -> None:
     :param gadget_manager: GadgetManager with references to HID devices
     :raises BlockingIOError: If HID device write is blocked
     """
-    if isinstance(event, RelEvent):
-        move_mouse(event, gadget_manager)
-    elif isinstance(event, KeyEvent):
-        send_key_event(event, gadget_manager)
+    handler = _EVENT_HANDLERS.get(event.type)
+    if handler is not None:
+        handler(event, gadget_manager)
 
 
-def move_mouse(event: RelEvent, gadget_manager: GadgetManager) -> None:
+def move_mouse(event: InputEvent, gadget_manager: GadgetManager) -> None:
     """
     Relay relative mouse movement events to the USB HID Mouse gadget.
 
-    :param event: A RelEvent describing the movement
+    :param event: An EV_REL InputEvent describing the movement
     :param gadget_manager: GadgetManager with Mouse reference
     :raises RuntimeError: If Mouse gadget is not available
     """
@@ -542,11 +913,11 @@ def move_mouse(event: RelEvent, gadget_manager: GadgetManager) -> None:
     mouse.move(x, y, mwheel)
 
 
-def send_key_event(event: KeyEvent, gadget_manager: GadgetManager) -> None:
+def send_key_event(event: InputEvent, gadget_manager: GadgetManager) -> None:
     """
     Relay a key event (press/release) to the appropriate HID gadget.
 
-    :param event: The KeyEvent to process
+    :param event: The EV_KEY InputEvent to process
     :param gadget_manager: GadgetManager with references to the HID devices
     :raises RuntimeError: If no appropriate HID gadget is available
     """
@@ -554,59 +925,75 @@ def send_key_event(event: KeyEvent, gadget_manager: GadgetManager) -> None:
     if key_id is None or key_name is None:
         return
 
-    output_gadget = get_output_device(event, gadget_manager)
-    if output_gadget is None:
+    key_actions = gadget_manager.get_key_actions(event)
+    if key_actions is None:
         raise RuntimeError("No appropriate USB gadget found (manager not enabled?).")
 
-    if event.keystate == KeyEvent.key_down:
-        _logger.debug(f"Pressing {key_name} (0x{key_id:02X}) via {output_gadget}")
-        output_gadget.press(key_id)
-    elif event.keystate == KeyEvent.key_up:
-        _logger.debug(f"Releasing {key_name} (0x{key_id:02X}) via {output_gadget}")
-        output_gadget.release(key_id)
+    press, release = key_actions
+    if event.value == KeyEvent.key_down:
+        _logger.debug("Pressing %s (0x%02X) via %s", key_name, key_id, press.__self__)
+        press(key_id)
+    elif event.value == KeyEvent.key_up:
+        _logger.debug(
+            "Releasing %s (0x%02X) via %s", key_name, key_id, release.__self__
+        )
+        release(key_id)
 
 
 def get_output_device(
-    event: KeyEvent, gadget_manager: GadgetManager
+    event: InputEvent, gadget_manager: GadgetManager
 ) -> Union[ConsumerControl, Keyboard, Mouse, None]:
     """
     Determine which HID gadget to target for the given key event.
 
-    :param event: The KeyEvent to process
+    :param event: The EV_KEY InputEvent to process
     :param gadget_manager: GadgetManager for HID references
     :return: A ConsumerControl, Mouse, or Keyboard object, or None if not found
     """
-    if is_consumer_key(event):
-        return gadget_manager.get_consumer()
-    elif is_mouse_button(event):
-        return gadget_manager.get_mouse()
-    return gadget_manager.get_keyboard()
+    gadgets = (
+        gadget_manager.get_keyboard(),
+        gadget_manager.get_mouse(),
+        gadget_manager.get_consumer(),
+    )
+    return gadgets[get_key_route(event)]
+
+
+_EVENT_HANDLERS: dict[int, Callable[[InputEvent, GadgetManager], None]] = {
+    ecodes.EV_REL: move_mouse,
+    ecodes.EV_KEY: send_key_event,
+}
+"""Relay functions by evdev event type; other event types are not relayed"""
 
 
 class UdcStateMonitor:
     """
     Monitors the UDC (USB Device Controller) state and
     sets/clears an Event when the device is configured or not.
+
+    The UDC core announces state changes via sysfs_notify(), which wakes
+    pollers of the state attribute with POLLPRI. The state file is therefore
+    watched through an epoll instance registered with the asyncio loop instead
+    of being polled periodically. Only while the file is missing, e.g. because
+    the UDC driver is reloaded, is it periodically reopened.
     """
 
     def __init__(
         self,
         relaying_active: asyncio.Event,
         udc_path: Path = Path("/sys/class/udc/20980000.usb/state"),
-        poll_interval: float = 0.5,
     ) -> None:
         """
         :param relaying_active: Event controlling whether relaying is active
         :param udc_path: Path to the UDC state file
-        :param poll_interval: Interval (seconds) to re-check the UDC state
         """
         self._relaying_active = relaying_active
         self.udc_path = udc_path
-        self.poll_interval = poll_interval
 
-        self._stop = False
-        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._epoll: Optional[select.epoll] = None
+        self._reopen_handle: Optional[asyncio.TimerHandle] = None
         self._last_state: Optional[str] = None
+        self._udc_fd: Optional[int] = None
 
         if not self.udc_path.is_file():
             _logger.warning(
@@ -615,41 +1002,123 @@ class UdcStateMonitor:
 
     async def __aenter__(self):
         """
-        Async context manager entry. Starts a background task to poll the UDC state.
+        Async context manager entry. Opens the UDC state file once, reads the
+        initial state and subscribes to state change notifications.
         """
-        self._stop = False
-        self._task = asyncio.create_task(self._poll_state())
+        self._loop = asyncio.get_running_loop()
+        self._watch()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """
-        Async context manager exit. Cancels the polling task.
+        Async context manager exit. Cancels a pending reopen, unsubscribes
+        from state change notifications and closes the UDC state file.
         """
-        if self._task:
-            self._stop = True
-            self._task.cancel()
-            await asyncio.gather(self._task, return_exceptions=True)
+        if self._reopen_handle is not None:
+            self._reopen_handle.cancel()
+            self._reopen_handle = None
+        self._stop_watching()
         return False
 
-    async def _poll_state(self):
-        while not self._stop:
-            new_state = self._read_udc_state()
-            if new_state != self._last_state:
-                self._handle_state_change(new_state)
-                self._last_state = new_state
-            await asyncio.sleep(self.poll_interval)
+    def _watch(self) -> None:
+        """
+        Open the UDC state file, handle its current state and subscribe to
+        state change notifications. If that fails, it is retried later.
+        """
+        self._reopen_handle = None
+        self._open_udc_state()
+        self._update_state()
+        if self._udc_fd is None:
+            self._schedule_reopen()
+            return
+
+        epoll = select.epoll()
+        try:
+            epoll.register(self._udc_fd, select.EPOLLPRI | select.EPOLLERR)
+        except OSError as ex:
+            _logger.warning("Cannot watch %s for changes: %s", self.udc_path, ex)
+            epoll.close()
+            self._stop_watching()
+            self._schedule_reopen()
+            return
+        self._epoll = epoll
+        self._loop.add_reader(epoll.fileno(), self._on_state_notify)
+
+    def _schedule_reopen(self) -> None:
+        """
+        Retry watching the UDC state file after _UDC_REOPEN_INTERVAL,
+        unless a retry is already pending.
+        """
+        if self._loop is not None and self._reopen_handle is None:
+            self._reopen_handle = self._loop.call_later(
+                _UDC_REOPEN_INTERVAL, self._watch
+            )
+
+    def _stop_watching(self) -> None:
+        """
+        Unsubscribe from UDC state change notifications, if subscribed,
+        and close the UDC state file.
+        """
+        if self._epoll is not None:
+            if self._loop is not None:
+                self._loop.remove_reader(self._epoll.fileno())
+            self._epoll.close()
+            self._epoll = None
+        if self._udc_fd is not None:
+            os.close(self._udc_fd)
+            self._udc_fd = None
+
+    def _on_state_notify(self) -> None:
+        """
+        Loop callback invoked when the kernel notifies a UDC state change.
+        Reading the attribute re-arms the notification.
+
+        Kernfs flags every notification with EPOLLERR, but once the UDC is
+        removed it reports EPOLLERR|EPOLLPRI permanently and the attribute no
+        longer reads. The stale descriptor is then dropped, which keeps the
+        loop from spinning, and the path is reopened until the UDC is back.
+        """
+        if self._epoll is not None:
+            self._epoll.poll(0)
+        self._update_state()
+
+    def _update_state(self) -> None:
+        """
+        Read the current UDC state and handle it if it differs from the last one.
+        """
+        new_state = self._read_udc_state()
+        if new_state != self._last_state:
+            self._handle_state_change(new_state)
+            self._last_state = new_state
+
+    def _open_udc_state(self) -> None:
+        """
+        Open the UDC state file and keep the descriptor for subsequent reads.
+        Sysfs attributes can be re-read by seeking back to the start.
+        """
+        try:
+            self._udc_fd = os.open(self.udc_path, os.O_RDONLY)
+        except OSError as ex:
+            _logger.debug("Could not open UDC state file %s: %s", self.udc_path, ex)
+            self._udc_fd = None
 
     def _read_udc_state(self) -> str:
         """
         Read the UDC state file. If not found, treat as "not_attached".
+        A descriptor that can no longer be read is closed and the file
+        reopened later.
 
         :return: The current UDC state (e.g. "configured")
         :rtype: str
         """
+        if self._udc_fd is None:
+            return "not_attached"
         try:
-            with open(self.udc_path, "r") as f:
-                return f.read().strip()
-        except FileNotFoundError:
+            return os.pread(self._udc_fd, 64, 0).decode().strip()
+        except OSError as ex:
+            _logger.warning("Cannot read %s, reopening it: %s", self.udc_path, ex)
+            self._stop_watching()
+            self._schedule_reopen()
             return "not_attached"
 
     def _handle_state_change(self, new_state: str):
@@ -659,7 +1128,7 @@ class UdcStateMonitor:
 
         :param new_state: The new UDC state
         """
-        _logger.debug(f"UDC state changed to '{new_state}'")
+        _logger.debug("UDC state changed to '%s'", new_state)
 
         if new_state == "configured":
             self._relaying_active.set()
@@ -667,54 +1136,80 @@ class UdcStateMonitor:
             self._relaying_active.clear()
 
 
+@cache
+def get_udev_context() -> pyudev.Context:
+    """
+    Get the process-wide pyudev context, creating it on first use.
+
+    :return: The shared pyudev Context
+    :rtype: pyudev.Context
+    """
+    return pyudev.Context()
+
+
 class UdevEventMonitor:
     """
     Monitors udev for /dev/input/event* add/remove events and
     notifies the RelayController.
+
+    The netlink socket is registered with the running asyncio loop, so udev
+    events are handled on the loop thread without a separate observer thread.
     """
 
     def __init__(self, relay_controller: RelayController) -> None:
         """
         :param relay_controller: The RelayController to add/remove devices
-        :param loop: The asyncio event loop
         """
         self.relay_controller = relay_controller
 
-        self.context = pyudev.Context()
+        self.context = get_udev_context()
         self.monitor = pyudev.Monitor.from_netlink(self.context)
         self.monitor.filter_by("input")
-        self.observer = pyudev.MonitorObserver(self.monitor, self._udev_event_callback)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
 
     async def __aenter__(self):
         """
-        Async context manager entry. Starts the pyudev monitor observer.
+        Async context manager entry. Starts the pyudev monitor and registers
+        its socket with the event loop.
         """
-        self.observer.start()
-        _logger.debug("UdevEventMonitor started observer.")
+        self._loop = asyncio.get_running_loop()
+        self.monitor.start()
+        self._loop.add_reader(self.monitor.fileno(), self._on_monitor_readable)
+        _logger.debug("UdevEventMonitor started.")
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """
-        Async context manager exit. Stops the pyudev monitor observer.
+        Async context manager exit. Unregisters the pyudev monitor socket.
         """
-        self.observer.stop()
-        _logger.debug("UdevEventMonitor stopped observer.")
+        if self._loop is not None:
+            self._loop.remove_reader(self.monitor.fileno())
+        _logger.debug("UdevEventMonitor stopped.")
         return False
 
+    def _on_monitor_readable(self) -> None:
+        """
+        Loop callback invoked when the udev netlink socket is readable.
+        Drains all queued events, so a burst (e.g. a reconnecting device
+        announcing several event nodes) is handled in a single wake-up.
+        """
+        while (device := self.monitor.poll(timeout=0)) is not None:
+            self._udev_event_callback(device.action, device)
+
     def _udev_event_callback(self, action: str, device: pyudev.Device) -> None:
         """
-        pyudev callback for input devices.
+        Handle a udev event for an input device.
 
         :param action: "add" or "remove"
         :param device: The pyudev device
         """
         device_node = device.device_node
-        if not device_node or not device_node.startswith("/dev/input/event"):
+        if not device_node or not device_node.startswith(_INPUT_PATH_PREFIX):
             return
 
         if action == "add":
-            _logger.debug(f"UdevEventMonitor: Added input => {device_node}")
+            _logger.debug("UdevEventMonitor: Added input => %s", device_node)
             self.relay_controller.add_device(device_node)
         elif action == "remove":
-            _logger.debug(f"UdevEventMonitor: Removed input => {device_node}")
+            _logger.debug("UdevEventMonitor: Removed input => %s", device_node)
             self.relay_controller.remove_device(device_node)